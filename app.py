@@ -8,6 +8,9 @@ Run with: streamlit run app.py
 
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from collections import namedtuple
 from datetime import datetime
 
 # Import our custom modules
@@ -15,7 +18,10 @@ from calculations import (
     calculate_monthly_payment,
     generate_base_amortization_schedule,
     generate_prepayment_schedule,
+    generate_batch_payoff_summary,
     calculate_scenario_comparison,
+    calculate_base_only_comparison,
+    get_base_stats,
     calculate_target_extra_payment,
     calculate_remaining_schedule_from_months,
     calculate_remaining_schedule_from_balance
@@ -30,10 +36,12 @@ from visualizations import (
 )
 from utils import (
     format_currency,
+    format_currency_series,
     format_months_to_years,
     validate_inputs,
     get_loan_type_suggestion,
-    validate_emi_sufficiency
+    validate_emi_sufficiency,
+    schedule_digest
 )
 
 # Page configuration
@@ -44,6 +52,211 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+# ============ CACHED HELPERS ============
+# The schedule generators are already cached in calculations.py; these wrappers
+# key the derived results on scalar loan inputs so reruns skip recomputation.
+
+# All sidebar loan inputs in one tuple of scalars, which Streamlit's cache
+# hashes in a single step
+LoanInputs = namedtuple(
+    "LoanInputs",
+    "principal annual_rate monthly_payment term_months "
+    "extra_monthly extra_payment_months lump_sum_amount lump_sum_month"
+)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _base_schedule(
+    principal: float,
+    annual_rate: float,
+    monthly_payment: float,
+    term_months: int
+) -> pd.DataFrame:
+    """
+    Base amortization schedule shared by reference across reruns.
+    
+    Every consumer only reads it (sums, row lookups, charts), so handing out
+    the one cached instance avoids cache_data's unpickled copy on each hit.
+    """
+    return generate_base_amortization_schedule(
+        principal, annual_rate, monthly_payment, term_months
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _base_as_prepayment_schedule(
+    principal: float,
+    annual_rate: float,
+    monthly_payment: float,
+    term_months: int
+) -> pd.DataFrame:
+    """
+    Base schedule laid out like a prepayment schedule. With no extras set the
+    prepayment simulation would only reproduce the base loan, so its columns
+    are filled in from the cached base schedule instead.
+    """
+    base_schedule = _base_schedule(principal, annual_rate, monthly_payment, term_months)
+    schedule = base_schedule.assign(Monthly_Payment=round(monthly_payment, 2))
+    schedule.insert(3, 'Extra_Payment', 0.0)
+    schedule.insert(4, 'Total_Payment', base_schedule['Monthly_Payment'])
+    return schedule
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _comparison(inputs: LoanInputs) -> dict:
+    """Scenario comparison for the given loan inputs."""
+    base_schedule = _base_schedule(
+        inputs.principal, inputs.annual_rate, inputs.monthly_payment, inputs.term_months
+    )
+    if inputs.extra_monthly <= 0 and inputs.lump_sum_amount <= 0:
+        return calculate_base_only_comparison(base_schedule)
+    
+    prepay_schedule = generate_prepayment_schedule(
+        inputs.principal, inputs.annual_rate, inputs.monthly_payment,
+        inputs.extra_monthly, inputs.extra_payment_months,
+        inputs.lump_sum_amount, inputs.lump_sum_month
+    )
+    return calculate_scenario_comparison(base_schedule, prepay_schedule, inputs.principal)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _scenario_comparison(
+    base_stats: tuple,
+    principal: float,
+    annual_rate: float,
+    monthly_payment: float,
+    extra_monthly: float
+) -> dict:
+    """Comparison of a constant extra-payment scenario against the base stats."""
+    scenario_schedule = generate_prepayment_schedule(
+        principal, annual_rate, monthly_payment,
+        extra_monthly=extra_monthly, extra_payment_months=0,
+        lump_sum_amount=0, lump_sum_month=1
+    )
+    return calculate_scenario_comparison(None, scenario_schedule, principal, base_stats=base_stats)
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _today() -> str:
+    """Today's date for the page header; only changes across calendar days."""
+    return datetime.now().strftime('%B %d, %Y')
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _comparison_table(
+    comparison: dict,
+    monthly_payment: float,
+    extra_monthly: float,
+    extra_payment_duration: int
+) -> pa.Table:
+    """
+    Formatted base-vs-prepayment table shown on the Summary tab.
+    
+    Every cell is text, so the columns convert to Arrow directly; mixing in
+    the raw month counts would send each render through Streamlit's slow
+    fallback conversion instead.
+    """
+    comparison_data = {
+        'Metric': [
+            'Monthly EMI',
+            'Total Months',
+            'Payoff Time',
+            'Total Interest',
+            'Total Amount Paid',
+            'Extra Payments Made'
+        ],
+        'Base Scenario': [
+            format_currency(monthly_payment),
+            str(comparison['base_months']),
+            format_months_to_years(comparison['base_months']),
+            format_currency(comparison['base_total_interest']),
+            format_currency(comparison['base_total_paid']),
+            format_currency(0)
+        ],
+        'With Prepayment': [
+            format_currency(monthly_payment + extra_monthly) if extra_payment_duration == 0 else f"{format_currency(monthly_payment + extra_monthly)} (for {extra_payment_duration} months)",
+            str(comparison['prepay_months']),
+            format_months_to_years(comparison['prepay_months']),
+            format_currency(comparison['prepay_total_interest']),
+            format_currency(comparison['prepay_total_paid']),
+            format_currency(comparison['total_extra_payments'])
+        ]
+    }
+    return pa.table(comparison_data)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _timeline_table(
+    principal: float,
+    annual_rate: float,
+    monthly_payment: float,
+    term_years: int,
+    base_total_interest: float
+) -> pd.DataFrame:
+    """Extra payment and savings needed for each fixed target timeline (Tab 4)."""
+    target_years = [years for years in [5, 10, 15, 20, 25] if years < term_years]
+    if not target_years:
+        return pd.DataFrame()
+    
+    extras_needed = [
+        calculate_target_extra_payment(principal, annual_rate, monthly_payment, years * 12)
+        for years in target_years
+    ]
+    
+    # Simulate all target timelines together rather than one schedule each
+    timeline_summary = generate_batch_payoff_summary(
+        principal, annual_rate, monthly_payment, extras_needed
+    )
+    interest_saved = base_total_interest - timeline_summary['Total_Interest']
+    if base_total_interest > 0:
+        savings_percentage = (interest_saved / base_total_interest * 100).round(2)
+    else:
+        savings_percentage = pd.Series(0, index=timeline_summary.index)
+    
+    return pd.DataFrame({
+        'Target': [f'{years} years' for years in target_years],
+        'Extra Monthly': format_currency_series(timeline_summary['Extra_Monthly']),
+        'Total EMI': format_currency_series(monthly_payment + timeline_summary['Extra_Monthly']),
+        'Interest Saved': format_currency_series(interest_saved),
+        'Savings %': savings_percentage.astype(str) + '%'
+    })
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _schedule_table(schedule_key: tuple, _schedule: pd.DataFrame, currency_cols: tuple) -> pa.Table:
+    """
+    Display-ready amortization table with currency columns as text.
+    
+    Built once per schedule and kept as an Arrow table, so reruns skip both
+    the per-cell formatting and Streamlit's pandas-to-Arrow conversion.
+    Arrow tables are immutable, which makes sharing the cached instance safe.
+    Columns go straight into the table, so the schedule itself is never copied.
+    """
+    return pa.table({
+        col: _schedule[col].map("₹{:,.2f}".format) if col in currency_cols else _schedule[col]
+        for col in _schedule.columns
+    })
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _schedule_csv(schedule_key: tuple, _schedule: pd.DataFrame) -> bytes:
+    """
+    CSV bytes for the download button (BOM-prefixed so Excel reads ₹).
+    
+    Rows are written by Arrow's C CSV writer straight from the schedule's
+    columns; only the plain header line is assembled here.
+    """
+    table = pa.Table.from_pandas(_schedule, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(
+        table, sink,
+        pa_csv.WriteOptions(include_header=False, quoting_style="needed")
+    )
+    header = ','.join(table.column_names) + '\n'
+    return header.encode(encoding='utf-8-sig') + sink.getvalue().to_pybytes()
+
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -348,7 +561,8 @@ lump_sum_month = st.sidebar.number_input(
 
 # Validate inputs
 is_valid, error_msg = validate_inputs(
-    principal, annual_rate_percent, term_years, extra_monthly, lump_sum
+    principal, annual_rate_percent, term_years, extra_monthly, lump_sum,
+    collect_all=False
 )
 
 if not is_valid:
@@ -365,6 +579,25 @@ if monthly_emi == 0:
 else:
     monthly_payment = monthly_emi
 
+inputs = LoanInputs(
+    principal, annual_rate, monthly_payment, term_months,
+    extra_monthly, extra_payment_duration, lump_sum, lump_sum_month
+)
+
+# Everything that feeds the analysis, including the existing-loan position
+if calculation_mode == "New Loan Analysis":
+    input_key = (calculation_mode, inputs)
+elif time_input_method == "Months/Years Completed":
+    input_key = (calculation_mode, inputs, time_input_method, months_elapsed)
+else:
+    input_key = (calculation_mode, inputs, time_input_method, current_balance)
+
+# Sidebar edits only take effect on Recalculate, so adjusting several fields
+# doesn't rebuild every schedule and chart after each one
+recalculate = st.sidebar.button("🔄 Recalculate", type="primary", use_container_width=True)
+if recalculate or '_applied_inputs' not in st.session_state:
+    st.session_state['_applied_inputs'] = input_key
+
 st.sidebar.markdown("---")
 if monthly_emi == 0:
     st.sidebar.success(f"📊 Calculated EMI: **{format_currency(monthly_payment)}**")
@@ -400,7 +633,18 @@ with st.sidebar.expander("ℹ️ How to Use This Calculator"):
 
 # ============ MAIN CONTENT AREA ============
 st.title("🏦 Loan Payoff Analysis")
-st.markdown(f"*Analysis generated on {datetime.now().strftime('%B %d, %Y')}*")
+st.markdown(f"*Analysis generated on {_today()}*")
+
+# Main-area widgets only render once the analysis is current, and only for the
+# selected view; Streamlit drops the state of widgets a run skips, so keep
+# their values as plain session state to survive a Recalculate or view switch
+for widget_key in ("view", "schedule_choice", "breakdown_radio", "target_years", "new_scenario_amount"):
+    if widget_key in st.session_state:
+        st.session_state[widget_key] = st.session_state[widget_key]
+
+if st.session_state['_applied_inputs'] != input_key:
+    st.info("Loan details changed. Click **🔄 Recalculate** in the sidebar to update the analysis.")
+    st.stop()
 
 # Generate schedules based on mode
 # NOTE: Schedules use original column names (e.g., 'Ending_Balance', 'Monthly_Payment')
@@ -409,17 +653,22 @@ with st.spinner("Calculating your loan scenarios..."):
     try:
         if calculation_mode == "New Loan Analysis":
             # Existing logic for new loans
-            base_schedule = generate_base_amortization_schedule(
+            base_schedule = _base_schedule(
                 principal, annual_rate, monthly_payment, term_months
             )
 
-            prepay_schedule = generate_prepayment_schedule(
-                principal, annual_rate, monthly_payment,
-                extra_monthly, extra_payment_duration, lump_sum, lump_sum_month
-            )
+            if extra_monthly > 0 or lump_sum > 0:
+                prepay_schedule = generate_prepayment_schedule(
+                    principal, annual_rate, monthly_payment,
+                    extra_monthly, extra_payment_duration, lump_sum, lump_sum_month
+                )
+            else:
+                prepay_schedule = _base_as_prepayment_schedule(
+                    principal, annual_rate, monthly_payment, term_months
+                )
+
+            comparison = _comparison(inputs)
 
-            comparison = calculate_scenario_comparison(base_schedule, prepay_schedule, principal)
-            
         else:  # Existing Loan Analysis
             annual_rate = annual_rate_percent / 100
             
@@ -437,10 +686,11 @@ with st.spinner("Calculating your loan scenarios..."):
                     annual_rate,
                     monthly_emi
                 )
-                current_balance = remaining_schedule.iloc[0]['Beginning_Balance'] if len(remaining_schedule) > 0 else 0
+                current_balance = remaining_schedule['Beginning_Balance'].iat[0] if len(remaining_schedule) > 0 else 0
             
             # For comparison purposes, use remaining schedule as base
-            base_schedule = remaining_schedule.copy()
+            # (cache hits already hand back a private copy; nothing mutates it)
+            base_schedule = remaining_schedule
             
             # Calculate with prepayment from current position
             if len(remaining_schedule) > 0:
@@ -454,19 +704,12 @@ with st.spinner("Calculating your loan scenarios..."):
                     1  # Lump sum in first remaining month
                 )
                 
-                # Set up comparison (treat current balance as the "principal" for comparison)
-                comparison = {
-                    'base_total_interest': round(remaining_schedule['Interest_Payment'].sum(), 2),
-                    'prepay_total_interest': round(prepay_schedule['Interest_Payment'].sum(), 2),
-                    'interest_saved': round(remaining_schedule['Interest_Payment'].sum() - prepay_schedule['Interest_Payment'].sum(), 2),
-                    'base_months': len(remaining_schedule),
-                    'prepay_months': len(prepay_schedule),
-                    'months_saved': len(remaining_schedule) - len(prepay_schedule),
-                    'base_total_paid': round(remaining_schedule['Monthly_Payment'].sum(), 2),
-                    'prepay_total_paid': round(prepay_schedule['Total_Payment'].sum(), 2),
-                    'total_extra_payments': round(prepay_schedule['Extra_Payment'].sum(), 2),
-                    'savings_percentage': round((remaining_schedule['Interest_Payment'].sum() - prepay_schedule['Interest_Payment'].sum()) / remaining_schedule['Interest_Payment'].sum() * 100, 2) if remaining_schedule['Interest_Payment'].sum() > 0 else 0
-                }
+                # Set up comparison (treat current balance as the "principal" for comparison),
+                # summing each remaining-schedule column once via its base stats
+                comparison = calculate_scenario_comparison(
+                    None, prepay_schedule, current_balance,
+                    base_stats=get_base_stats(remaining_schedule)
+                )
                 monthly_payment = monthly_emi
             else:
                 st.success("🎉 Your loan is already paid off!")
@@ -526,18 +769,24 @@ if calculation_mode == "Existing Loan Analysis":
     
     st.markdown("---")
 
-# Create tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 Summary", 
-    "📅 Amortization Schedule", 
-    "📈 Visualizations",
-    "🎯 Target Payoff Calculator",
-    "📖 Methodology"
-])
+# View selector; unlike st.tabs, only the selected view's code runs on a rerun
+view = st.radio(
+    "View",
+    [
+        "📊 Summary", 
+        "📅 Amortization Schedule", 
+        "📈 Visualizations",
+        "🎯 Target Payoff Calculator",
+        "📖 Methodology"
+    ],
+    horizontal=True,
+    key="view",
+    label_visibility="collapsed"
+)
 
 
 # ============ TAB 1: SUMMARY ============
-with tab1:
+if view == "📊 Summary":
     st.header("Loan Comparison Summary")
     
     if has_prepayment:
@@ -571,35 +820,8 @@ with tab1:
     # Comparison table
     st.subheader("📋 Detailed Comparison")
     
-    comparison_data = {
-        'Metric': [
-            'Monthly EMI',
-            'Total Months',
-            'Payoff Time',
-            'Total Interest',
-            'Total Amount Paid',
-            'Extra Payments Made'
-        ],
-        'Base Scenario': [
-            format_currency(monthly_payment),
-            comparison['base_months'],
-            format_months_to_years(comparison['base_months']),
-            format_currency(comparison['base_total_interest']),
-            format_currency(comparison['base_total_paid']),
-            format_currency(0)
-        ],
-        'With Prepayment': [
-            format_currency(monthly_payment + extra_monthly) if extra_payment_duration == 0 else f"{format_currency(monthly_payment + extra_monthly)} (for {extra_payment_duration} months)",
-            comparison['prepay_months'],
-            format_months_to_years(comparison['prepay_months']),
-            format_currency(comparison['prepay_total_interest']),
-            format_currency(comparison['prepay_total_paid']),
-            format_currency(comparison['total_extra_payments'])
-        ]
-    }
-    
-    comparison_df = pd.DataFrame(comparison_data)
-    st.dataframe(comparison_df, use_container_width=True, hide_index=True)
+    comparison_table = _comparison_table(comparison, monthly_payment, extra_monthly, extra_payment_duration)
+    st.dataframe(comparison_table, use_container_width=True, hide_index=True)
     
     if has_prepayment:
         st.markdown("""
@@ -617,22 +839,26 @@ with tab1:
 
 
 # ============ TAB 2: AMORTIZATION SCHEDULE ============
-with tab2:
+# Tabs with their own widgets are fragments, so interacting with them reruns
+# only that tab instead of the whole app.
+@st.fragment
+def render_amortization_tab(base_schedule: pd.DataFrame, prepay_schedule: pd.DataFrame):
     st.header("Amortization Schedule")
     
+    schedules = {
+        "Base Scenario": base_schedule,
+        "Prepayment Scenario": prepay_schedule
+    }
     schedule_choice = st.radio(
         "Select Schedule to View:",
-        ["Base Scenario", "Prepayment Scenario"],
-        horizontal=True
+        list(schedules),
+        horizontal=True,
+        key="schedule_choice"
     )
-    
-    if schedule_choice == "Base Scenario":
-        display_schedule = base_schedule.copy()
-    else:
-        display_schedule = prepay_schedule.copy()
+    original_schedule = schedules[schedule_choice]
     
     # Rename columns for better clarity
-    display_schedule = display_schedule.rename(columns={
+    display_schedule = original_schedule.rename(columns={
         'Beginning_Balance': 'Balance at Start',
         'Ending_Balance': 'Balance at End',
         'Monthly_Payment': 'EMI Paid',
@@ -650,16 +876,15 @@ with tab2:
     if 'Extra Payment' in display_schedule.columns:
         currency_cols.extend(['Extra Payment', 'Total Payment'])
     
-    # Create formatted version for display
-    formatted_schedule = display_schedule.copy()
-    for col in currency_cols:
-        if col in formatted_schedule.columns:
-            formatted_schedule[col] = formatted_schedule[col].apply(lambda x: f"₹{x:,.2f}")
-    
-    st.dataframe(formatted_schedule, use_container_width=True, hide_index=True)
+    schedule_key = schedule_digest(display_schedule)
+    st.dataframe(
+        _schedule_table(schedule_key, display_schedule, tuple(currency_cols)),
+        use_container_width=True,
+        hide_index=True
+    )
     
     # Download button with proper encoding
-    csv = display_schedule.to_csv(index=False, encoding='utf-8-sig')
+    csv = _schedule_csv(schedule_key, display_schedule)
     st.download_button(
         label="📥 Download Schedule as CSV",
         data=csv,
@@ -671,23 +896,33 @@ with tab2:
     st.markdown("---")
     col1, col2, col3, col4 = st.columns(4)
     
-    # Get the original schedule to access correct column names
-    original_schedule = base_schedule if schedule_choice == "Base Scenario" else prepay_schedule
+    # Use the original schedule to access correct column names
+    interest_col = original_schedule['Interest_Payment']
     
     with col1:
         st.metric("Total Months", len(display_schedule))
     with col2:
-        st.metric("Total Interest", format_currency(original_schedule['Interest_Payment'].sum()))
+        st.metric("Total Interest", format_currency(interest_col.to_numpy().sum()))
     with col3:
-        first_interest = original_schedule.iloc[0]['Interest_Payment']
+        first_interest = interest_col.iat[0]
         st.metric("First Month Interest", format_currency(first_interest))
     with col4:
-        last_interest = original_schedule.iloc[-1]['Interest_Payment']
+        last_interest = interest_col.iat[-1]
         st.metric("Last Month Interest", format_currency(last_interest))
 
 
+if view == "📅 Amortization Schedule":
+    render_amortization_tab(base_schedule, prepay_schedule)
+
+
 # ============ TAB 3: VISUALIZATIONS ============
-with tab3:
+@st.fragment
+def render_visualizations_tab(
+    base_schedule: pd.DataFrame,
+    prepay_schedule: pd.DataFrame,
+    comparison: dict,
+    has_prepayment: bool
+):
     st.header("Visual Analysis")
     
     # Balance comparison chart
@@ -722,17 +957,18 @@ with tab3:
     st.subheader("📊 Payment Breakdown Over Time")
     st.caption("See how your payment splits between principal and interest each month")
     
+    breakdown_schedules = {
+        "Base Scenario": base_schedule,
+        "With Prepayment": prepay_schedule
+    }
     breakdown_choice = st.radio(
         "Select scenario:",
-        ["Base Scenario", "With Prepayment"],
+        list(breakdown_schedules),
         horizontal=True,
         key="breakdown_radio"
     )
     
-    if breakdown_choice == "Base Scenario":
-        fig_breakdown = plot_payment_breakdown(base_schedule)
-    else:
-        fig_breakdown = plot_payment_breakdown(prepay_schedule)
+    fig_breakdown = plot_payment_breakdown(breakdown_schedules[breakdown_choice])
     
     st.plotly_chart(fig_breakdown, use_container_width=True)
     
@@ -745,8 +981,22 @@ with tab3:
         st.plotly_chart(fig_savings, use_container_width=True)
 
 
+if view == "📈 Visualizations":
+    render_visualizations_tab(base_schedule, prepay_schedule, comparison, has_prepayment)
+
+
 # ============ TAB 4: TARGET PAYOFF CALCULATOR ============
-with tab4:
+@st.fragment
+def render_target_tab(
+    principal: float,
+    annual_rate: float,
+    annual_rate_percent: float,
+    monthly_payment: float,
+    term_years: int,
+    term_months: int,
+    base_stats: tuple,
+    comparison: dict
+):
     st.header("🎯 Target Payoff Calculator")
     st.markdown("""
     Want to pay off your loan faster? Enter your target timeline and we'll calculate 
@@ -758,15 +1008,24 @@ with tab4:
     # Reverse Calculator Section
     st.subheader("Calculate Required Extra Payment")
     
+    # Target range bounds derived once from the loan term
+    target_max_years = term_years - 1
+    target_default_years = max(1, term_years // 2)
+    
+    # Seeded through session state (not value=) so the kept value carries over;
+    # a shorter loan term resets a target that no longer fits
+    if not 1 <= st.session_state.get("target_years", 0) <= target_max_years:
+        st.session_state["target_years"] = target_default_years
+    
     col1, col2, col3 = st.columns(3)
     
     with col1:
         target_years_input = st.number_input(
             "Target Payoff Time (years)",
             min_value=1,
-            max_value=term_years - 1,
-            value=max(1, term_years // 2),
+            max_value=target_max_years,
             step=1,
+            key="target_years",
             help="How many years do you want to pay off the loan in?"
         )
     
@@ -794,15 +1053,9 @@ with tab4:
             principal, annual_rate, monthly_payment, target_months_input
         )
         
-        # Generate the target scenario
-        target_schedule = generate_prepayment_schedule(
-            principal, annual_rate, monthly_payment,
-            extra_monthly=required_extra, extra_payment_months=0,
-            lump_sum_amount=0, lump_sum_month=1
-        )
-        
-        target_comparison = calculate_scenario_comparison(
-            base_schedule, target_schedule, principal
+        # Compare the target scenario against the base schedule
+        target_comparison = _scenario_comparison(
+            base_stats, principal, annual_rate, monthly_payment, required_extra
         )
         
         st.markdown("---")
@@ -818,7 +1071,7 @@ with tab4:
             
             **New total EMI:** {format_currency(monthly_payment + required_extra)}
             
-            **Months to payoff:** {len(target_schedule)} months
+            **Months to payoff:** {target_comparison['prepay_months']} months
             """)
         
         with result_col2:
@@ -839,7 +1092,7 @@ with tab4:
         quick_compare = pd.DataFrame({
             'Scenario': ['Original Loan', f'Pay off in {target_years_input} years'],
             'Monthly Payment': [format_currency(monthly_payment), format_currency(monthly_payment + required_extra)],
-            'Total Duration': [format_months_to_years(term_months), format_months_to_years(len(target_schedule))],
+            'Total Duration': [format_months_to_years(term_months), format_months_to_years(target_comparison['prepay_months'])],
             'Total Interest': [format_currency(comparison['base_total_interest']), format_currency(target_comparison['prepay_total_interest'])],
             'You Save': ['-', format_currency(target_comparison['interest_saved'])]
         })
@@ -856,34 +1109,10 @@ with tab4:
     st.caption("See how different payoff targets affect your payments and savings")
     
     # Generate comparison for different target years
-    timeline_options = []
-    for years in [5, 10, 15, 20, 25]:
-        if years < term_years:
-            target_m = years * 12
-            extra_needed = calculate_target_extra_payment(
-                principal, annual_rate, monthly_payment, target_m
-            )
-            
-            temp_schedule = generate_prepayment_schedule(
-                principal, annual_rate, monthly_payment,
-                extra_monthly=extra_needed, extra_payment_months=0,
-                lump_sum_amount=0, lump_sum_month=1
-            )
-            
-            temp_comparison = calculate_scenario_comparison(
-                base_schedule, temp_schedule, principal
-            )
-            
-            timeline_options.append({
-                'Target': f'{years} years',
-                'Extra Monthly': format_currency(extra_needed),
-                'Total EMI': format_currency(monthly_payment + extra_needed),
-                'Interest Saved': format_currency(temp_comparison['interest_saved']),
-                'Savings %': f"{temp_comparison['savings_percentage']}%"
-            })
-    
-    if timeline_options:
-        timeline_df = pd.DataFrame(timeline_options)
+    timeline_df = _timeline_table(
+        principal, annual_rate, monthly_payment, term_years, base_stats[1]
+    )
+    if not timeline_df.empty:
         st.dataframe(timeline_df, use_container_width=True, hide_index=True)
     
     st.markdown("---")
@@ -898,54 +1127,73 @@ with tab4:
     
     col1, col2 = st.columns([3, 1])
     with col1:
+        st.session_state.setdefault("new_scenario_amount", 15000)
         new_amount = st.number_input(
             "Extra payment amount to add (₹):",
             min_value=0,
             max_value=5000000,
-            value=15000,
-            step=1000
+            step=1000,
+            key="new_scenario_amount"
         )
     with col2:
         st.markdown("<br>", unsafe_allow_html=True)
+        # The table below is drawn after these buttons in the same (fragment)
+        # run, so it already reflects the change without forcing a full rerun
         if st.button("➕ Add"):
             if new_amount not in st.session_state.scenarios and new_amount > 0:
                 st.session_state.scenarios.append(new_amount)
-                st.rerun()
     
     if st.button("🗑️ Clear All"):
         st.session_state.scenarios = []
-        st.rerun()
     
     # Generate comparison table
     if st.session_state.scenarios:
-        scenario_results = []
+        # Rows are kept per extra amount for the current loan, so adding a
+        # scenario only simulates the new amount; a loan change starts afresh
+        scenario_key = (principal, annual_rate, monthly_payment, term_years) + base_stats
+        if st.session_state.get('_scenario_key') != scenario_key:
+            st.session_state['_scenario_key'] = scenario_key
+            st.session_state['_scenario_rows'] = {}
+        scenario_rows = st.session_state['_scenario_rows']
         
-        for extra in sorted(st.session_state.scenarios):
-            scenario_schedule = generate_prepayment_schedule(
-                principal, annual_rate, monthly_payment,
-                extra_monthly=extra, extra_payment_months=0,
-                lump_sum_amount=0, lump_sum_month=1
-            )
-            
-            scenario_comparison = calculate_scenario_comparison(
-                base_schedule, scenario_schedule, principal
+        extras_shown = sorted(st.session_state.scenarios)
+        missing = [extra for extra in extras_shown if extra not in scenario_rows]
+        if missing:
+            # Simulate the new scenarios together in one batched pass
+            scenario_summary = generate_batch_payoff_summary(
+                principal, annual_rate, monthly_payment, missing
             )
+            extras = scenario_summary['Extra_Monthly']
+            payoff_months = scenario_summary['Payoff_Months']
+            total_interest = scenario_summary['Total_Interest']
             
-            scenario_results.append({
-                'Extra Monthly': format_currency(extra),
-                'Total EMI': format_currency(monthly_payment + extra),
-                'Months to Payoff': scenario_comparison['prepay_months'],
-                'Payoff Time': format_months_to_years(scenario_comparison['prepay_months']),
-                'Interest Saved': format_currency(scenario_comparison['interest_saved']),
-                'Total Interest': format_currency(scenario_comparison['prepay_total_interest'])
+            new_rows = pd.DataFrame({
+                'Extra Monthly': format_currency_series(extras),
+                'Total EMI': format_currency_series(monthly_payment + extras),
+                'Months to Payoff': payoff_months,
+                'Payoff Time': payoff_months.map(format_months_to_years),
+                'Interest Saved': format_currency_series(base_stats[1] - total_interest),
+                'Total Interest': format_currency_series(total_interest)
             })
+            st.session_state['_scenario_columns'] = list(new_rows.columns)
+            scenario_rows.update(zip(missing, new_rows.itertuples(index=False, name=None)))
         
-        scenarios_df = pd.DataFrame(scenario_results)
+        scenarios_df = pd.DataFrame.from_records(
+            [scenario_rows[extra] for extra in extras_shown],
+            columns=st.session_state['_scenario_columns']
+        )
         st.dataframe(scenarios_df, use_container_width=True, hide_index=True)
 
 
+if view == "🎯 Target Payoff Calculator":
+    render_target_tab(
+        principal, annual_rate, annual_rate_percent, monthly_payment,
+        term_years, term_months, get_base_stats(base_schedule), comparison
+    )
+
+
 # ============ TAB 5: METHODOLOGY ============
-with tab5:
+if view == "📖 Methodology":
     st.header("How It Works")
     
     st.markdown("""
@@ -965,7 +1213,7 @@ with tab5:
         - **r** = Monthly interest rate (annual rate / 12)
         - **n** = Total number of payments (months)
         
-        *We use numpy-financial's `pmt()` function which implements this formula.*
+        *This is the same formula numpy-financial's `pmt()` implements.*
         """)
     
     with st.expander("💰 Interest Calculation"):
@@ -1003,11 +1251,11 @@ with tab5:
     
     with st.expander("🎯 Target Payoff Calculator"):
         st.markdown("""
-        The reverse calculator uses binary search to find the exact extra payment needed:
+        The reverse calculator solves the EMI formula for your target timeline:
         
         1. Input your target payoff timeline (e.g., 15 years instead of 30)
-        2. The algorithm iteratively tests different extra payment amounts
-        3. It finds the minimum extra payment that achieves your target
+        2. It computes the EMI that would clear the loan in exactly that many months
+        3. The difference from your current EMI is the minimum extra payment needed
         
         This helps you plan your budget and understand the trade-off between 
         higher monthly payments and interest savings.
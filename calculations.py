@@ -4,9 +4,10 @@ Loan Calculation Functions
 Core financial calculations for loan amortization and prepayment analysis.
 """
 
+import math
+import numpy as np
 import pandas as pd
-import numpy_financial as npf
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence, Tuple
 import streamlit as st
 
 
@@ -29,14 +30,76 @@ def calculate_monthly_payment(principal: float, annual_rate: float, term_months:
     
     monthly_rate = annual_rate / 12
     
-    # Using numpy-financial's pmt function
-    # Returns negative value (cash outflow), so we take absolute
-    payment = npf.pmt(monthly_rate, term_months, -principal)
+    # Standard annuity formula, evaluated the way numpy-financial's pmt() does
+    # (np.power rather than float ** keeps the result bit-identical to it)
+    # without its argument conversion and broadcasting overhead
+    growth = float(np.power(1 + monthly_rate, term_months))
+    payment = principal * growth / ((growth - 1) / monthly_rate)
     
     return abs(payment)
 
 
-@st.cache_data(show_spinner=False)
+def _amortize_core(
+    principal: float,
+    monthly_rate: float,
+    monthly_payment: float,
+    extra_payments: list,
+    max_months: int,
+    tolerance: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    Month-by-month amortization loop shared by the schedule generators.
+    
+    Args:
+        principal: Starting loan balance
+        monthly_rate: Monthly interest rate as decimal
+        monthly_payment: Fixed monthly payment amount
+        extra_payments: Extra principal paid in each month (index 0 = month 1),
+            at least max_months long
+        max_months: Maximum number of months to simulate
+        tolerance: Balance at or below which the loan counts as paid off
+    
+    Returns:
+        Tuple of (beginning_balance, interest, principal_paid, extra_paid)
+        arrays, one entry per month simulated, and the final balance
+    """
+    beginning_col = []
+    interest_col = []
+    principal_col = []
+    extra_col = []
+    balance = principal
+    month = 0
+    
+    while balance > tolerance and month < max_months:
+        beginning_balance = balance
+        interest_payment = beginning_balance * monthly_rate
+        base_principal = monthly_payment - interest_payment
+        extra_this_month = extra_payments[month]
+        principal_payment = base_principal + extra_this_month
+        
+        # Final month - don't overpay, cap at remaining balance
+        if principal_payment > beginning_balance:
+            principal_payment = beginning_balance
+            extra_this_month = max(principal_payment - base_principal, 0.0)
+        
+        beginning_col.append(beginning_balance)
+        interest_col.append(interest_payment)
+        principal_col.append(principal_payment)
+        extra_col.append(extra_this_month)
+        
+        balance = beginning_balance - principal_payment
+        month += 1
+    
+    return (
+        np.array(beginning_col, dtype=np.float64),
+        np.array(interest_col, dtype=np.float64),
+        np.array(principal_col, dtype=np.float64),
+        np.array(extra_col, dtype=np.float64),
+        balance
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
 def generate_base_amortization_schedule(
     principal: float,
     annual_rate: float,
@@ -58,64 +121,46 @@ def generate_base_amortization_schedule(
     """
     monthly_rate = annual_rate / 12
     
-    # Initialize lists to store schedule data
-    schedule_data = []
-    balance = principal
-    cumulative_interest = 0
-    month = 0
-    
     # Run until balance is paid off (with safety limit at 2x original term)
     max_months = max(term_months * 2, 600)
     
-    while balance > 0.01 and month < max_months:
-        month += 1
-        beginning_balance = balance
-        
-        # Calculate interest for this month
-        interest_payment = beginning_balance * monthly_rate
-        
-        # Principal is whatever's left after interest
-        principal_payment = monthly_payment - interest_payment
-        
-        # Handle final month - might need adjustment
-        if principal_payment >= beginning_balance:
-            principal_payment = beginning_balance
-            actual_payment = principal_payment + interest_payment
-        else:
-            actual_payment = monthly_payment
-        
-        ending_balance = max(beginning_balance - principal_payment, 0)
-        cumulative_interest += interest_payment
-        
-        # Add this month's data
-        schedule_data.append({
-            'Month': month,
-            'Beginning_Balance': round(beginning_balance, 2),
-            'Monthly_Payment': round(actual_payment, 2),
-            'Principal_Payment': round(principal_payment, 2),
-            'Interest_Payment': round(interest_payment, 2),
-            'Ending_Balance': round(ending_balance, 2),
-            'Cumulative_Interest': round(cumulative_interest, 2)
-        })
-        
-        balance = ending_balance
-        
-        # Stop if loan is paid off
-        if balance <= 0.01:
-            break
+    # With no extra payments the balance after t payments has a closed form,
+    # so the whole trajectory comes from one array expression, not a loop
+    t = np.arange(max_months + 1)
+    if monthly_rate == 0:
+        balances = principal - monthly_payment * t
+    else:
+        growth = (1 + monthly_rate) ** t
+        balances = principal * growth - monthly_payment * (growth - 1) / monthly_rate
     
     # Check if loan was paid off
-    if balance > 0.01:
+    paid_off = np.flatnonzero(balances <= 0.01)
+    if len(paid_off) == 0:
         raise ValueError(
             f"Loan cannot be paid off with EMI ₹{monthly_payment:,.0f}. "
-            f"Balance remaining after {month} months: ₹{balance:,.0f}. "
+            f"Balance remaining after {max_months} months: ₹{balances[-1]:,.0f}. "
             f"Please increase your EMI or check your inputs."
         )
     
-    return pd.DataFrame(schedule_data)
+    beginning = balances[:paid_off[0]]
+    interest = beginning * monthly_rate
+    # Final month - don't overpay, cap at remaining balance
+    principal_paid = np.minimum(monthly_payment - interest, beginning)
+    
+    # Build the DataFrame once from whole columns; the final month's
+    # payment is smaller since only the remaining balance is due
+    return pd.DataFrame({
+        'Month': np.arange(1, len(beginning) + 1),
+        'Beginning_Balance': beginning.round(2),
+        'Monthly_Payment': (principal_paid + interest).round(2),
+        'Principal_Payment': principal_paid.round(2),
+        'Interest_Payment': interest.round(2),
+        'Ending_Balance': np.maximum(beginning - principal_paid, 0).round(2),
+        'Cumulative_Interest': np.cumsum(interest).round(2)
+    })
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_data(show_spinner=False, max_entries=64)
 def generate_prepayment_schedule(
     principal: float,
     annual_rate: float,
@@ -142,103 +187,144 @@ def generate_prepayment_schedule(
     """
     monthly_rate = annual_rate / 12
     
-    schedule_data = []
-    balance = principal
-    cumulative_interest = 0
-    month = 0
+    # Safety limit - don't go beyond 50 years
+    max_months = 601
     
-    while balance > 0:
-        month += 1
-        beginning_balance = balance
-        
-        # Calculate interest
-        interest_payment = beginning_balance * monthly_rate
-        
-        # Determine extra payment for this month
-        extra_this_month = 0
-        
-        # Add recurring extra payment (if within the specified duration or unlimited)
-        if extra_payment_months == 0 or month <= extra_payment_months:
-            extra_this_month += extra_monthly
-        
-        # Add lump sum if this is the right month
-        if month == lump_sum_month:
-            extra_this_month += lump_sum_amount
-        
-        # Calculate principal portion
-        base_principal = monthly_payment - interest_payment
-        total_principal = base_principal + extra_this_month
-        
-        # Don't overpay - cap at remaining balance
-        if total_principal > beginning_balance:
-            total_principal = beginning_balance
-            extra_this_month = total_principal - base_principal
-            if extra_this_month < 0:
-                extra_this_month = 0
-                total_principal = beginning_balance
-        
-        ending_balance = beginning_balance - total_principal
-        cumulative_interest += interest_payment
-        
-        # Calculate total payment this month
-        total_payment = interest_payment + total_principal
-        
-        schedule_data.append({
-            'Month': month,
-            'Beginning_Balance': round(beginning_balance, 2),
-            'Monthly_Payment': round(monthly_payment, 2),
-            'Extra_Payment': round(extra_this_month, 2),
-            'Total_Payment': round(total_payment, 2),
-            'Principal_Payment': round(total_principal, 2),
-            'Interest_Payment': round(interest_payment, 2),
-            'Ending_Balance': round(max(ending_balance, 0), 2),
-            'Cumulative_Interest': round(cumulative_interest, 2)
-        })
+    # Lay out the extra payment for every month up front
+    extra_months = max_months if extra_payment_months == 0 else min(extra_payment_months, max_months)
+    extra_payments = [float(extra_monthly)] * extra_months + [0.0] * (max_months - extra_months)
+    if 1 <= lump_sum_month <= max_months:
+        extra_payments[lump_sum_month - 1] += lump_sum_amount
+    
+    beginning, interest, principal_paid, extra_paid, balance = _amortize_core(
+        principal, monthly_rate, monthly_payment,
+        extra_payments, max_months, tolerance=0
+    )
+    
+    if balance > 0:
+        st.warning("⚠️ Schedule exceeds 50 years. Check your EMI amount.")
+    
+    return pd.DataFrame({
+        'Month': np.arange(1, len(beginning) + 1),
+        'Beginning_Balance': beginning.round(2),
+        'Monthly_Payment': np.full(len(beginning), round(monthly_payment, 2)),
+        'Extra_Payment': extra_paid.round(2),
+        'Total_Payment': (interest + principal_paid).round(2),
+        'Principal_Payment': principal_paid.round(2),
+        'Interest_Payment': interest.round(2),
+        'Ending_Balance': np.maximum(beginning - principal_paid, 0).round(2),
+        'Cumulative_Interest': np.cumsum(interest).round(2)
+    })
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def generate_batch_payoff_summary(
+    principal: float,
+    annual_rate: float,
+    monthly_payment: float,
+    extra_payments: Sequence[float]
+) -> pd.DataFrame:
+    """
+    Simulate several constant extra-payment scenarios side by side.
+    
+    All scenarios are stepped month by month together as one NumPy array,
+    which is much cheaper than building a full schedule for each of them.
+    Totals match generate_prepayment_schedule (interest is summed from the
+    monthly amounts rounded to paise).
+    
+    Args:
+        principal: Original loan amount
+        annual_rate: Annual interest rate as decimal
+        monthly_payment: Base monthly payment amount
+        extra_payments: Extra amount paid every month, one per scenario
+    
+    Returns:
+        DataFrame with one row per scenario: Extra_Monthly, Payoff_Months
+        and Total_Interest
+    """
+    monthly_rate = annual_rate / 12
+    extras = np.asarray(extra_payments, dtype=np.float64)
+    
+    balance = np.full(len(extras), float(principal))
+    payoff_months = np.zeros(len(extras), dtype=np.int64)
+    total_interest = np.zeros(len(extras))
+    
+    # Same 50-year safety limit as generate_prepayment_schedule
+    for _ in range(601):
+        active = balance > 0
+        if not active.any():
+            break
         
-        balance = ending_balance
+        interest = balance * monthly_rate
+        principal_payment = np.minimum(monthly_payment - interest + extras, balance)
         
-        # Safety check - don't go beyond 50 years
-        if month > 600:
-            st.warning("⚠️ Schedule exceeds 50 years. Check your EMI amount.")
-            break
+        total_interest += np.where(active, interest.round(2), 0)
+        payoff_months += active
+        balance = np.where(active, balance - principal_payment, 0)
     
-    return pd.DataFrame(schedule_data)
+    return pd.DataFrame({
+        'Extra_Monthly': extras,
+        'Payoff_Months': payoff_months,
+        'Total_Interest': total_interest.round(2)
+    })
+
+
+def get_base_stats(base_schedule: pd.DataFrame) -> Tuple[int, float, float]:
+    """
+    Get the base schedule totals used by calculate_scenario_comparison.
+    
+    Args:
+        base_schedule: DataFrame from generate_base_amortization_schedule
+    
+    Returns:
+        Tuple of (months, total_interest, total_paid)
+    """
+    return (
+        len(base_schedule),
+        base_schedule['Interest_Payment'].sum(),
+        base_schedule['Monthly_Payment'].sum()
+    )
 
 
 def calculate_scenario_comparison(
-    base_schedule: pd.DataFrame,
+    base_schedule: Optional[pd.DataFrame],
     prepay_schedule: pd.DataFrame,
-    principal: float
+    principal: float,
+    base_stats: Optional[Tuple[int, float, float]] = None
 ) -> Dict:
     """
     Compare base scenario with prepayment scenario and calculate savings.
     
     Args:
         base_schedule: DataFrame from generate_base_amortization_schedule
+            (may be None when base_stats is given)
         prepay_schedule: DataFrame from generate_prepayment_schedule
         principal: Original loan amount
+        base_stats: Precomputed (months, total_interest, total_paid) of the
+            base schedule, from get_base_stats. Lets callers comparing many
+            scenarios against one base skip re-summing it every time.
     
     Returns:
         Dictionary containing comparison metrics
     """
     # Verify both schedules are complete (loan fully paid off)
-    if base_schedule.iloc[-1]['Ending_Balance'] > 1:
+    if base_stats is None and base_schedule['Ending_Balance'].iat[-1] > 1:
         raise ValueError(
             f"Base schedule incomplete! Remaining balance: "
-            f"₹{base_schedule.iloc[-1]['Ending_Balance']:,.2f}. "
+            f"₹{base_schedule['Ending_Balance'].iat[-1]:,.2f}. "
             f"Increase term or check EMI calculation."
         )
     
-    if prepay_schedule.iloc[-1]['Ending_Balance'] > 1:
+    if prepay_schedule['Ending_Balance'].iat[-1] > 1:
         raise ValueError(
             f"Prepayment schedule incomplete! Remaining balance: "
-            f"₹{prepay_schedule.iloc[-1]['Ending_Balance']:,.2f}"
+            f"₹{prepay_schedule['Ending_Balance'].iat[-1]:,.2f}"
         )
     
     # Calculate totals from base schedule
-    base_total_interest = base_schedule['Interest_Payment'].sum()
-    base_months = len(base_schedule)
-    base_total_paid = base_schedule['Monthly_Payment'].sum()
+    if base_stats is None:
+        base_stats = get_base_stats(base_schedule)
+    base_months, base_total_interest, base_total_paid = base_stats
     
     # Calculate totals from prepayment schedule
     prepay_total_interest = prepay_schedule['Interest_Payment'].sum()
@@ -264,7 +350,37 @@ def calculate_scenario_comparison(
     }
 
 
-@st.cache_data(show_spinner=False)
+def calculate_base_only_comparison(base_schedule: pd.DataFrame) -> Dict:
+    """
+    Comparison metrics for a scenario with no extra payments.
+    
+    Without extras the prepayment scenario is the base scenario, so this
+    reports the base totals on both sides and zero savings instead of
+    simulating and summing a second, identical schedule.
+    
+    Args:
+        base_schedule: DataFrame from generate_base_amortization_schedule
+    
+    Returns:
+        Dictionary with the same keys as calculate_scenario_comparison
+    """
+    base_months, base_total_interest, base_total_paid = get_base_stats(base_schedule)
+    
+    return {
+        'base_total_interest': round(base_total_interest, 2),
+        'prepay_total_interest': round(base_total_interest, 2),
+        'interest_saved': 0.0,
+        'base_months': base_months,
+        'prepay_months': base_months,
+        'months_saved': 0,
+        'base_total_paid': round(base_total_paid, 2),
+        'prepay_total_paid': round(base_total_paid, 2),
+        'total_extra_payments': 0.0,
+        'savings_percentage': 0
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
 def calculate_target_extra_payment(
     principal: float,
     annual_rate: float,
@@ -273,7 +389,10 @@ def calculate_target_extra_payment(
 ) -> float:
     """
     Calculate the extra monthly payment needed to pay off loan in target months.
-    Uses binary search to find the required extra payment.
+    
+    The EMI that amortizes the loan over exactly target_months has a closed
+    form, so the required extra is that EMI minus the current payment, rounded
+    up to the next paisa.
     
     Args:
         principal: Original loan amount
@@ -284,47 +403,25 @@ def calculate_target_extra_payment(
     Returns:
         Extra monthly payment required to meet target
     """
-    # If target is longer than natural payoff, no extra needed
-    base_schedule = generate_base_amortization_schedule(
-        principal, annual_rate, monthly_payment, target_months + 120
-    )
-    if len(base_schedule) <= target_months:
+    required_payment = calculate_monthly_payment(principal, annual_rate, target_months)
+    
+    # If the current EMI already pays off within the target, no extra needed
+    if required_payment <= monthly_payment:
         return 0.0
     
-    # Binary search for the right extra payment
-    low = 0
-    high = principal / target_months  # Max would be paying it all equally
-    tolerance = 0.01
+    extra = math.ceil((required_payment - monthly_payment) * 100) / 100
     
-    for _ in range(100):  # Max iterations
-        mid = (low + high) / 2
-        
-        # Generate schedule with this extra payment
-        test_schedule = generate_prepayment_schedule(
-            principal, annual_rate, monthly_payment,
-            extra_monthly=mid, lump_sum_amount=0, lump_sum_month=1
-        )
-        
-        actual_months = len(test_schedule)
-        
-        if abs(actual_months - target_months) <= 1:
-            # Close enough, but verify we're at or below target
-            if actual_months <= target_months:
-                return round(mid, 2)
-            else:
-                low = mid
-        elif actual_months > target_months:
-            # Need more extra payment
-            low = mid
-        else:
-            # Paying too fast, reduce extra
-            high = mid
-        
-        # Check if we've converged
-        if high - low < tolerance:
-            break
+    # Floating-point residue can leave a few paise for one more month;
+    # a single simulated pass catches that and adds the missing paisa
+    max_months = 601  # Same safety limit as generate_prepayment_schedule
+    beginning_balances = _amortize_core(
+        principal, annual_rate / 12, monthly_payment,
+        [extra] * max_months, max_months, tolerance=0
+    )[0]
+    if len(beginning_balances) > target_months:
+        extra = round(extra + 0.01, 2)
     
-    return round(mid, 2)
+    return extra
 
 
 def get_payoff_summary(schedule: pd.DataFrame) -> Dict:
@@ -340,12 +437,26 @@ def get_payoff_summary(schedule: pd.DataFrame) -> Dict:
     return {
         'total_months': len(schedule),
         'total_interest': round(schedule['Interest_Payment'].sum(), 2),
-        'final_payment': round(schedule.iloc[-1]['Monthly_Payment'] if 'Monthly_Payment' in schedule.columns else schedule.iloc[-1]['Total_Payment'], 2),
+        'final_payment': round(schedule['Monthly_Payment'].iat[-1] if 'Monthly_Payment' in schedule.columns else schedule['Total_Payment'].iat[-1], 2),
         'avg_monthly_interest': round(schedule['Interest_Payment'].mean(), 2)
     }
 
 
-@st.cache_data(show_spinner=False)
+def _remaining_payments(
+    beginning: np.ndarray,
+    interest: np.ndarray,
+    principal_paid: np.ndarray,
+    monthly_payment: float
+) -> np.ndarray:
+    """
+    EMI actually paid each month of a remaining schedule: the full EMI,
+    except the final month, which only covers the balance and its interest.
+    """
+    final_month = monthly_payment - interest >= beginning
+    return np.where(final_month, principal_paid + interest, monthly_payment)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
 def calculate_remaining_schedule_from_months(
     original_principal: float,
     annual_rate: float,
@@ -382,43 +493,25 @@ def calculate_remaining_schedule_from_months(
     current_balance = balance
     
     # Now generate remaining schedule starting from current balance
-    schedule_data = []
-    month_number = months_elapsed + 1
-    
-    while balance > 0.01 and month_number <= original_term_months + 120:  # Some buffer
-        beginning_balance = balance
-        interest_payment = beginning_balance * monthly_rate
-        principal_payment = monthly_payment - interest_payment
-        
-        # Handle final payment
-        if principal_payment >= beginning_balance:
-            principal_payment = beginning_balance
-            actual_payment = principal_payment + interest_payment
-        else:
-            actual_payment = monthly_payment
-        
-        ending_balance = max(beginning_balance - principal_payment, 0)
-        
-        schedule_data.append({
-            'Month': month_number,
-            'Months_From_Now': month_number - months_elapsed,
-            'Beginning_Balance': round(beginning_balance, 2),
-            'Monthly_Payment': round(actual_payment, 2),
-            'Principal_Payment': round(principal_payment, 2),
-            'Interest_Payment': round(interest_payment, 2),
-            'Ending_Balance': round(ending_balance, 2)
-        })
-        
-        balance = ending_balance
-        month_number += 1
-        
-        if balance <= 0.01:
-            break
-    
-    return pd.DataFrame(schedule_data), current_balance
+    max_months = max(original_term_months + 120 - months_elapsed, 0)  # Some buffer
+    beginning, interest, principal_paid, _, _ = _amortize_core(
+        current_balance, monthly_rate, monthly_payment,
+        [0.0] * max_months, max_months, tolerance=0.01
+    )
+    months_from_now = np.arange(1, len(beginning) + 1)
+    
+    return pd.DataFrame({
+        'Month': months_from_now + months_elapsed,
+        'Months_From_Now': months_from_now,
+        'Beginning_Balance': beginning.round(2),
+        'Monthly_Payment': _remaining_payments(beginning, interest, principal_paid, monthly_payment).round(2),
+        'Principal_Payment': principal_paid.round(2),
+        'Interest_Payment': interest.round(2),
+        'Ending_Balance': np.maximum(beginning - principal_paid, 0).round(2)
+    }), current_balance
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_data(show_spinner=False, max_entries=64)
 def calculate_remaining_schedule_from_balance(
     current_balance: float,
     annual_rate: float,
@@ -436,40 +529,19 @@ def calculate_remaining_schedule_from_balance(
         DataFrame with remaining payment schedule
     """
     monthly_rate = annual_rate / 12
-    balance = current_balance
-    schedule_data = []
-    month = 1
-    cumulative_interest = 0
+    max_months = 600
     
-    while balance > 0.01 and month <= 600:
-        beginning_balance = balance
-        interest_payment = beginning_balance * monthly_rate
-        principal_payment = monthly_payment - interest_payment
-        
-        # Handle final payment
-        if principal_payment >= beginning_balance:
-            principal_payment = beginning_balance
-            actual_payment = principal_payment + interest_payment
-        else:
-            actual_payment = monthly_payment
-        
-        ending_balance = max(beginning_balance - principal_payment, 0)
-        cumulative_interest += interest_payment
-        
-        schedule_data.append({
-            'Month': month,
-            'Beginning_Balance': round(beginning_balance, 2),
-            'Monthly_Payment': round(actual_payment, 2),
-            'Principal_Payment': round(principal_payment, 2),
-            'Interest_Payment': round(interest_payment, 2),
-            'Ending_Balance': round(ending_balance, 2),
-            'Cumulative_Interest': round(cumulative_interest, 2)
-        })
-        
-        balance = ending_balance
-        month += 1
-        
-        if balance <= 0.01:
-            break
+    beginning, interest, principal_paid, _, _ = _amortize_core(
+        current_balance, monthly_rate, monthly_payment,
+        [0.0] * max_months, max_months, tolerance=0.01
+    )
     
-    return pd.DataFrame(schedule_data)
+    return pd.DataFrame({
+        'Month': np.arange(1, len(beginning) + 1),
+        'Beginning_Balance': beginning.round(2),
+        'Monthly_Payment': _remaining_payments(beginning, interest, principal_paid, monthly_payment).round(2),
+        'Principal_Payment': principal_paid.round(2),
+        'Interest_Payment': interest.round(2),
+        'Ending_Balance': np.maximum(beginning - principal_paid, 0).round(2),
+        'Cumulative_Interest': np.cumsum(interest).round(2)
+    })
@@ -1,138 +1,273 @@
 """
-Quick Test Script for Loan Calculator Improvements
-Run this to verify the critical fixes are working
+Tests for Loan Calculator Improvements
+Run with pytest to verify the critical fixes are working
 """
 
-import sys
-sys.path.insert(0, r'c:\python prac\Loan payoff calculator')
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import streamlit
+from streamlit.testing.v1 import AppTest
 
 from calculations import (
-    calculate_monthly_payment,
     generate_base_amortization_schedule,
     generate_prepayment_schedule,
     calculate_scenario_comparison,
+    calculate_base_only_comparison,
+    calculate_target_extra_payment,
+    generate_batch_payoff_summary,
     calculate_remaining_schedule_from_months,
     calculate_remaining_schedule_from_balance
 )
-from utils import validate_emi_sufficiency
-
-print("=" * 60)
-print("TESTING LOAN CALCULATOR IMPROVEMENTS")
-print("=" * 60)
+from utils import (
+    format_currency,
+    format_currency_series,
+    schedule_digest,
+    validate_emi_sufficiency,
+    validate_inputs
+)
 
 # Test Case: Your father's loan
-principal = 5_000_000  # ₹50L
-annual_rate = 0.085  # 8.5%
-term_months = 240  # 20 years
-monthly_payment = 43_391  # ₹43,391
-
-print("\n1. Testing Base Schedule Generation (Critical Fix)")
-print("-" * 60)
-try:
-    base_schedule = generate_base_amortization_schedule(
-        principal, annual_rate, monthly_payment, term_months
+PRINCIPAL = 5_000_000  # ₹50L
+ANNUAL_RATE = 0.085  # 8.5%
+TERM_MONTHS = 240  # 20 years
+MONTHLY_PAYMENT = 43_391  # ₹43,391
+
+
+@pytest.fixture(scope='session')
+def base_schedule():
+    return generate_base_amortization_schedule(
+        PRINCIPAL, ANNUAL_RATE, MONTHLY_PAYMENT, TERM_MONTHS
     )
-    print(f"✅ Base schedule generated successfully")
-    print(f"   Total months: {len(base_schedule)}")
-    print(f"   Final balance: ₹{base_schedule.iloc[-1]['Ending_Balance']:,.2f}")
-    print(f"   Total interest: ₹{base_schedule['Interest_Payment'].sum():,.2f}")
-    
-    if base_schedule.iloc[-1]['Ending_Balance'] < 1:
-        print("   ✅ Loan fully paid off!")
-    else:
-        print("   ❌ ERROR: Loan not paid off!")
-except Exception as e:
-    print(f"❌ ERROR: {e}")
-
-print("\n2. Testing Prepayment Schedule")
-print("-" * 60)
-try:
-    prepay_schedule = generate_prepayment_schedule(
-        principal, annual_rate, monthly_payment,
+
+
+@pytest.fixture(scope='session')
+def prepay_schedule():
+    return generate_prepayment_schedule(
+        PRINCIPAL, ANNUAL_RATE, MONTHLY_PAYMENT,
         extra_monthly=5000,  # ₹5,000 extra per month
         extra_payment_months=0,  # All months
         lump_sum_amount=0,
         lump_sum_month=1
     )
-    print(f"✅ Prepayment schedule generated successfully")
-    print(f"   Total months: {len(prepay_schedule)}")
-    print(f"   Final balance: ₹{prepay_schedule.iloc[-1]['Ending_Balance']:,.2f}")
-    print(f"   Total interest: ₹{prepay_schedule['Interest_Payment'].sum():,.2f}")
+
+
+@pytest.fixture(scope='session')
+def comparison(base_schedule, prepay_schedule):
+    return calculate_scenario_comparison(base_schedule, prepay_schedule, PRINCIPAL)
+
+
+def test_base_schedule_pays_off(base_schedule):
+    """Base schedule runs until the loan is fully paid off (Critical Fix)."""
+    assert base_schedule['Ending_Balance'].iat[-1] < 1
+    # The rounded-down EMI needs one month beyond the nominal term
+    assert len(base_schedule) == TERM_MONTHS + 1
+
+
+def test_prepayment_schedule_pays_off(prepay_schedule, base_schedule):
+    assert prepay_schedule['Ending_Balance'].iat[-1] < 1
+    assert len(prepay_schedule) < len(base_schedule)
+    assert prepay_schedule['Interest_Payment'].sum() < base_schedule['Interest_Payment'].sum()
+
+
+def test_scenario_comparison(comparison, base_schedule, prepay_schedule):
+    assert comparison['base_months'] == len(base_schedule)
+    assert comparison['prepay_months'] == len(prepay_schedule)
+    assert comparison['months_saved'] == len(base_schedule) - len(prepay_schedule)
+    assert comparison['interest_saved'] > 0
+    assert 0 < comparison['savings_percentage'] < 100
+
+
+@pytest.mark.parametrize('emi, expected_valid', [
+    (43_391, True),
+    (30_000, False),
+])
+def test_emi_sufficiency(emi, expected_valid):
+    is_valid, msg = validate_emi_sufficiency(PRINCIPAL, ANNUAL_RATE, TERM_MONTHS, emi)
+    assert is_valid == expected_valid
+    assert bool(msg) != expected_valid
+
+
+@pytest.mark.parametrize('months_elapsed', [0, 60, 120])
+def test_remaining_schedule_from_months(months_elapsed, base_schedule):
+    remaining_schedule, current_balance = calculate_remaining_schedule_from_months(
+        PRINCIPAL, ANNUAL_RATE, MONTHLY_PAYMENT, months_elapsed, TERM_MONTHS
+    )
+    expected_balance = (
+        PRINCIPAL if months_elapsed == 0
+        else base_schedule['Ending_Balance'].iat[months_elapsed - 1]
+    )
+    assert current_balance == pytest.approx(expected_balance, abs=0.01)
+    assert len(remaining_schedule) == len(base_schedule) - months_elapsed
+    assert remaining_schedule['Month'].iat[0] == months_elapsed + 1
+    assert remaining_schedule['Ending_Balance'].iat[-1] < 1
+
+
+def test_remaining_schedule_from_balance():
+    current_balance = 3_500_000  # ₹35L
+    remaining_schedule = calculate_remaining_schedule_from_balance(
+        current_balance, ANNUAL_RATE, MONTHLY_PAYMENT
+    )
+    assert remaining_schedule['Beginning_Balance'].iat[0] == current_balance
+    assert remaining_schedule['Ending_Balance'].iat[-1] < 1
+    assert remaining_schedule['Cumulative_Interest'].iat[-1] == pytest.approx(
+        remaining_schedule['Interest_Payment'].sum(), abs=1
+    )
+
+
+@pytest.mark.parametrize('inputs, messages', [
+    ((5_000_000, 8.5, 20, 0, 0), []),
+    ((0, 8.5, 20, 0, 0), ["Loan amount must be greater than ₹0"]),
+    ((0, -1, 20, 0, 0), [
+        "Loan amount must be greater than ₹0",
+        "Interest rate cannot be negative"
+    ]),
+    ((5_000_000, 8.5, 60, -100, -100), [
+        "Loan term cannot exceed 50 years",
+        "Extra payment cannot be negative",
+        "Lump sum payment cannot be negative"
+    ]),
+])
+def test_validate_inputs(inputs, messages):
+    # Default reports every failing check, joined in order
+    assert validate_inputs(*inputs) == (not messages, "; ".join(messages))
+    # Short-circuit mode reports the first failure alone
+    first_only = validate_inputs(*inputs, collect_all=False)
+    assert first_only == (not messages, messages[0] if messages else "")
+
+
+def _payoff_months(principal, annual_rate, monthly_payment, extra_monthly):
+    return len(generate_prepayment_schedule(
+        principal, annual_rate, monthly_payment,
+        extra_monthly=extra_monthly, extra_payment_months=0,
+        lump_sum_amount=0, lump_sum_month=1
+    ))
+
+
+@pytest.mark.parametrize('principal, annual_rate, monthly_payment, target_months', [
+    (PRINCIPAL, ANNUAL_RATE, MONTHLY_PAYMENT, 120),
+    (PRINCIPAL, ANNUAL_RATE, MONTHLY_PAYMENT, 60),
+    (2_500_000, 0.12, 30_000, 48),
+    (1_000_000, 0.0, 5_000, 100),
+    (PRINCIPAL, ANNUAL_RATE, 35_000, 120),
+])
+def test_target_extra_payment_is_smallest_sufficient(
+    principal, annual_rate, monthly_payment, target_months
+):
+    extra = calculate_target_extra_payment(principal, annual_rate, monthly_payment, target_months)
+    assert extra > 0
+    assert _payoff_months(principal, annual_rate, monthly_payment, extra) <= target_months
+    # One paisa less misses the target
+    assert _payoff_months(principal, annual_rate, monthly_payment, extra - 0.01) > target_months
+
+
+def test_target_extra_payment_not_needed(base_schedule):
+    extra = calculate_target_extra_payment(
+        PRINCIPAL, ANNUAL_RATE, MONTHLY_PAYMENT, len(base_schedule)
+    )
+    assert extra == 0.0
+
+
+def test_target_extra_payment_with_unpayable_emi():
+    # ₹30,000 doesn't cover the monthly interest, so the base loan never ends
+    with pytest.raises(ValueError):
+        generate_base_amortization_schedule(PRINCIPAL, ANNUAL_RATE, 30_000, TERM_MONTHS)
     
-    if prepay_schedule.iloc[-1]['Ending_Balance'] < 1:
-        print("   ✅ Loan fully paid off!")
-    else:
-        print("   ❌ ERROR: Loan not paid off!")
-except Exception as e:
-    print(f"❌ ERROR: {e}")
-
-print("\n3. Testing Scenario Comparison")
-print("-" * 60)
-try:
-    comparison = calculate_scenario_comparison(base_schedule, prepay_schedule, principal)
-    print(f"✅ Comparison calculated successfully")
-    print(f"   Base months: {comparison['base_months']}")
-    print(f"   Prepay months: {comparison['prepay_months']}")
-    print(f"   Months saved: {comparison['months_saved']}")
-    print(f"   Interest saved: ₹{comparison['interest_saved']:,.2f}")
-    print(f"   Savings %: {comparison['savings_percentage']:.2f}%")
-except Exception as e:
-    print(f"❌ ERROR: {e}")
-
-print("\n4. Testing EMI Sufficiency Validation")
-print("-" * 60)
-try:
-    # Test with sufficient EMI
-    is_valid, msg = validate_emi_sufficiency(principal, annual_rate, term_months, 43391)
-    print(f"   EMI ₹43,391: {'✅ Valid' if is_valid else '❌ Invalid'}")
-    if msg:
-        print(f"   Message: {msg}")
+    # The target solve still returns the smallest extra that meets the target
+    extra = calculate_target_extra_payment(PRINCIPAL, ANNUAL_RATE, 30_000, 180)
+    assert _payoff_months(PRINCIPAL, ANNUAL_RATE, 30_000, extra) <= 180
+    assert _payoff_months(PRINCIPAL, ANNUAL_RATE, 30_000, extra - 0.01) > 180
+
+
+def test_batch_payoff_summary_matches_schedules():
+    extras = [0, 1_000, 5_000, 25_000]
+    summary = generate_batch_payoff_summary(PRINCIPAL, ANNUAL_RATE, MONTHLY_PAYMENT, extras)
     
-    # Test with insufficient EMI
-    is_valid, msg = validate_emi_sufficiency(principal, annual_rate, term_months, 30000)
-    print(f"   EMI ₹30,000: {'✅ Valid' if is_valid else '❌ Invalid (Expected)'}")
-    if msg:
-        print(f"   Message: {msg}")
-except Exception as e:
-    print(f"❌ ERROR: {e}")
-
-print("\n5. Testing Mid-Loan Analysis (Months Elapsed)")
-print("-" * 60)
-try:
-    # Simulate 5 years of payments
-    months_elapsed = 60  # 5 years
-    remaining_schedule, current_balance = calculate_remaining_schedule_from_months(
-        principal, annual_rate, monthly_payment, months_elapsed, term_months
+    assert summary['Extra_Monthly'].tolist() == extras
+    for extra, payoff_months, total_interest in summary.itertuples(index=False):
+        schedule = generate_prepayment_schedule(
+            PRINCIPAL, ANNUAL_RATE, MONTHLY_PAYMENT,
+            extra_monthly=extra, extra_payment_months=0,
+            lump_sum_amount=0, lump_sum_month=1
+        )
+        assert payoff_months == len(schedule)
+        assert total_interest == round(schedule['Interest_Payment'].sum(), 2)
+
+
+def test_base_only_comparison(base_schedule, comparison):
+    base_only = calculate_base_only_comparison(base_schedule)
+    
+    assert base_only.keys() == comparison.keys()
+    for key in ('base_total_interest', 'base_months', 'base_total_paid'):
+        assert base_only[key] == comparison[key]
+    
+    # Without extras, the prepayment side is the base loan and nothing is saved
+    assert base_only['prepay_total_interest'] == base_only['base_total_interest']
+    assert base_only['prepay_months'] == base_only['base_months']
+    assert base_only['prepay_total_paid'] == base_only['base_total_paid']
+    assert base_only['interest_saved'] == 0
+    assert base_only['months_saved'] == 0
+    assert base_only['total_extra_payments'] == 0
+    assert base_only['savings_percentage'] == 0
+
+
+def test_schedule_digest(base_schedule):
+    digest = schedule_digest(base_schedule)
+    assert schedule_digest(base_schedule.copy()) == digest
+    
+    # Any one value changing by a paisa gives a different digest
+    changed = base_schedule.copy()
+    changed.loc[100, 'Interest_Payment'] += 0.01
+    assert schedule_digest(changed) != digest
+    
+    # So does the same data under different column names
+    renamed = base_schedule.rename(columns={'Interest_Payment': 'Interest'})
+    assert schedule_digest(renamed) != digest
+
+
+def test_format_currency_series():
+    amounts = pd.Series([1_234_567.891, 0.0, 100.0, -500.5], index=[3, 1, 4, 1])
+    formatted = format_currency_series(amounts)
+    
+    assert formatted.tolist() == ['₹12,34,567.89', '₹0.00', '₹100.00', '-₹500.50']
+    assert formatted.tolist() == [format_currency(amount) for amount in amounts]
+    assert formatted.index.equals(amounts.index)
+
+
+def test_view_survives_recalculate():
+    app = AppTest.from_file("app.py", default_timeout=60).run()
+    app.radio(key="view").set_value("📈 Visualizations").run()
+    app.radio(key="breakdown_radio").set_value("With Prepayment").run()
+    
+    # A sidebar edit gates the analysis (and its widgets) until Recalculate
+    extra_input = next(
+        widget for widget in app.sidebar.number_input
+        if widget.label == "Extra Amount Per Month (₹)"
     )
-    print(f"✅ Remaining schedule calculated successfully")
-    print(f"   Current balance: ₹{current_balance:,.2f}")
-    print(f"   Remaining months: {len(remaining_schedule)}")
-    print(f"   Remaining interest: ₹{remaining_schedule['Interest_Payment'].sum():,.2f}")
-except Exception as e:
-    print(f"❌ ERROR: {e}")
-
-print("\n6. Testing Mid-Loan Analysis (From Balance)")
-print("-" * 60)
-try:
-    # Simulate current balance of ₹35L
-    current_balance_input = 3_500_000
-    remaining_schedule_2 = calculate_remaining_schedule_from_balance(
-        current_balance_input, annual_rate, monthly_payment
+    extra_input.set_value(5000).run()
+    assert not any(radio.key == "view" for radio in app.radio)
+    
+    recalculate = next(button for button in app.sidebar.button if "Recalculate" in button.label)
+    recalculate.click().run()
+    
+    assert not app.exception
+    assert app.radio(key="view").value == "📈 Visualizations"
+    assert app.radio(key="breakdown_radio").value == "With Prepayment"
+
+
+def test_chart_payload_decodes_in_streamlit_frontend():
+    app = AppTest.from_file("app.py", default_timeout=60).run()
+    app.radio(key="view").set_value("📈 Visualizations").run()
+    
+    # Plotly 6 sends numeric trace data as base64 typed-array specs...
+    figure = json.loads(app.get("plotly_chart")[0].proto.spec)
+    assert 'bdata' in figure['data'][0]['x']
+    
+    # ...so the plotly.js bundled with the installed Streamlit must decode them
+    static_dir = Path(streamlit.__file__).parent / "static"
+    assert any(
+        "decodeTypedArraySpec" in js_file.read_text(encoding="utf-8", errors="ignore")
+        for js_file in static_dir.rglob("*.js")
     )
-    print(f"✅ Remaining schedule from balance calculated successfully")
-    print(f"   Starting balance: ₹{current_balance_input:,.2f}")
-    print(f"   Remaining months: {len(remaining_schedule_2)}")
-    print(f"   Remaining interest: ₹{remaining_schedule_2['Interest_Payment'].sum():,.2f}")
-except Exception as e:
-    print(f"❌ ERROR: {e}")
-
-print("\n" + "=" * 60)
-print("TEST SUMMARY")
-print("=" * 60)
-print("✅ All critical improvements are working!")
-print("\nKey Findings:")
-print(f"   - Base loan takes {len(base_schedule)} months (not {term_months})")
-print(f"   - With ₹5K extra/month: saves {comparison['months_saved']} months")
-print(f"   - Interest savings: ₹{comparison['interest_saved']:,.2f}")
-print(f"   - Savings: {comparison['savings_percentage']:.1f}%")
-print("=" * 60)
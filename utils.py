@@ -4,8 +4,12 @@ Utility Functions
 Helper functions for formatting and validation.
 """
 
+import hashlib
+from functools import lru_cache
 from typing import Tuple
 
+import pandas as pd
+
 
 def format_currency(amount: float) -> str:
     """
@@ -55,10 +59,44 @@ def format_currency(amount: float) -> str:
     return result
 
 
+def format_currency_series(amounts: pd.Series) -> pd.Series:
+    """
+    Format a whole column of amounts as INR currency strings.
+    
+    Args:
+        amounts: Series of rupee amounts
+    
+    Returns:
+        Series of strings formatted like format_currency
+    """
+    return amounts.map(format_currency)
+
+
+def schedule_digest(schedule: pd.DataFrame) -> tuple:
+    """
+    Exact, cheap fingerprint of a numeric schedule DataFrame.
+    
+    Used as a cache key (or hash_funcs entry) in place of Streamlit's own
+    DataFrame hashing, which costs over a millisecond per lookup.
+    
+    Args:
+        schedule: Amortization schedule with numeric columns only
+    
+    Returns:
+        Tuple of (column names, MD5 digest of the values)
+    """
+    values = schedule.to_numpy(dtype='float64')
+    return tuple(schedule.columns), hashlib.md5(values.tobytes()).digest()
+
+
+@lru_cache(maxsize=1024)
 def format_months_to_years(months: int) -> str:
     """
     Convert months to a readable years and months string.
     
+    Payoff durations span a few hundred distinct values, so results are
+    memoized and repeated rows reuse the formatted string.
+    
     Args:
         months: Total number of months
     
@@ -86,7 +124,8 @@ def validate_inputs(
     rate: float,
     term: int,
     extra_payment: float = 0,
-    lump_sum: float = 0
+    lump_sum: float = 0,
+    collect_all: bool = True
 ) -> Tuple[bool, str]:
     """
     Validate all loan calculator inputs.
@@ -97,6 +136,8 @@ def validate_inputs(
         term: Loan term in years
         extra_payment: Monthly extra payment amount
         lump_sum: One-time extra payment
+        collect_all: Report every failing check; when False, stop at the
+            first failing group of checks and report only its first message
     
     Returns:
         Tuple of (is_valid, error_message)
@@ -108,24 +149,32 @@ def validate_inputs(
         errors.append("Loan amount must be greater than ₹0")
     if principal > 100_000_000:
         errors.append("Loan amount seems unreasonably high")
+    if errors and not collect_all:
+        return False, errors[0]
     
     # Check interest rate
     if rate < 0:
         errors.append("Interest rate cannot be negative")
     if rate > 50:
         errors.append("Interest rate seems unreasonably high (max 50%)")
+    if errors and not collect_all:
+        return False, errors[0]
     
     # Check term
     if term <= 0:
         errors.append("Loan term must be at least 1 year")
     if term > 50:
         errors.append("Loan term cannot exceed 50 years")
+    if errors and not collect_all:
+        return False, errors[0]
     
     # Check extra payments
     if extra_payment < 0:
         errors.append("Extra payment cannot be negative")
     if lump_sum < 0:
         errors.append("Lump sum payment cannot be negative")
+    if errors and not collect_all:
+        return False, errors[0]
     
     if errors:
         return False, "; ".join(errors)
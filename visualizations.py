@@ -5,11 +5,18 @@ Plotly chart functions for loan analysis visualizations.
 """
 
 import plotly.graph_objects as go
-import plotly.express as px
+import numpy as np
 import pandas as pd
 from typing import Dict
+import streamlit as st
 
+from utils import schedule_digest
 
+# Figures are cached per schedule; hash the frames by digest, not cell by cell
+_FRAME_HASH_FUNCS = {pd.DataFrame: schedule_digest}
+
+
+@st.cache_resource(show_spinner=False, max_entries=16, hash_funcs=_FRAME_HASH_FUNCS)
 def plot_balance_comparison(base_df: pd.DataFrame, prepay_df: pd.DataFrame) -> go.Figure:
     """
     Create line chart comparing loan balances over time for both scenarios.
@@ -23,25 +30,26 @@ def plot_balance_comparison(base_df: pd.DataFrame, prepay_df: pd.DataFrame) -> g
     """
     fig = go.Figure()
     
-    # Base scenario line
-    fig.add_trace(go.Scatter(
-        x=base_df['Month'],
-        y=base_df['Ending_Balance'],
-        mode='lines',
-        name='Base Scenario',
-        line=dict(color='#3498db', width=2),
-        hovertemplate='Month %{x}<br>Balance: ₹%{y:,.2f}<extra></extra>'
-    ))
-    
-    # Prepayment scenario line
-    fig.add_trace(go.Scatter(
-        x=prepay_df['Month'],
-        y=prepay_df['Ending_Balance'],
-        mode='lines',
-        name='With Extra Payments',
-        line=dict(color='#27ae60', width=2),
-        hovertemplate='Month %{x}<br>Balance: ₹%{y:,.2f}<extra></extra>'
-    ))
+    fig.add_traces([
+        # Base scenario line
+        go.Scatter(
+            x=base_df['Month'].to_numpy(),
+            y=base_df['Ending_Balance'].to_numpy(),
+            mode='lines',
+            name='Base Scenario',
+            line=dict(color='#3498db', width=2),
+            hovertemplate='Month %{x}<br>Balance: ₹%{y:,.2f}<extra></extra>'
+        ),
+        # Prepayment scenario line
+        go.Scatter(
+            x=prepay_df['Month'].to_numpy(),
+            y=prepay_df['Ending_Balance'].to_numpy(),
+            mode='lines',
+            name='With Extra Payments',
+            line=dict(color='#27ae60', width=2),
+            hovertemplate='Month %{x}<br>Balance: ₹%{y:,.2f}<extra></extra>'
+        )
+    ])
     
     fig.update_layout(
         title='Loan Balance Over Time',
@@ -58,6 +66,7 @@ def plot_balance_comparison(base_df: pd.DataFrame, prepay_df: pd.DataFrame) -> g
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=16)
 def plot_interest_comparison(comparison_dict: Dict) -> go.Figure:
     """
     Create bar chart showing total interest paid in each scenario.
@@ -80,7 +89,7 @@ def plot_interest_comparison(comparison_dict: Dict) -> go.Figure:
             x=scenarios,
             y=interest_values,
             marker_color=colors,
-            text=[f'₹{val:,.2f}' for val in interest_values],
+            texttemplate='₹%{y:,.2f}',
             textposition='outside'
         )
     ])
@@ -108,6 +117,7 @@ def plot_interest_comparison(comparison_dict: Dict) -> go.Figure:
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=16, hash_funcs=_FRAME_HASH_FUNCS)
 def plot_payment_breakdown(schedule_df: pd.DataFrame) -> go.Figure:
     """
     Create stacked area chart showing principal vs interest breakdown over time.
@@ -118,32 +128,37 @@ def plot_payment_breakdown(schedule_df: pd.DataFrame) -> go.Figure:
     Returns:
         Plotly figure object
     """
-    fig = go.Figure()
+    months = schedule_df['Month'].to_numpy()
+    principal = schedule_df['Principal_Payment'].to_numpy()
+    interest = schedule_df['Interest_Payment'].to_numpy()
     
-    # Principal payment area (bottom)
-    fig.add_trace(go.Scatter(
-        x=schedule_df['Month'],
-        y=schedule_df['Principal_Payment'],
-        fill='tozeroy',
-        name='Principal',
-        mode='lines',
-        line=dict(width=0.5, color='#27ae60'),
-        fillcolor='rgba(39, 174, 96, 0.6)',
-        hovertemplate='Month %{x}<br>Principal: ₹%{y:,.2f}<extra></extra>'
-    ))
+    fig = go.Figure()
     
-    # Interest payment area (stacked on top)
-    fig.add_trace(go.Scatter(
-        x=schedule_df['Month'],
-        y=schedule_df['Principal_Payment'] + schedule_df['Interest_Payment'],
-        fill='tonexty',
-        name='Interest',
-        mode='lines',
-        line=dict(width=0.5, color='#e74c3c'),
-        fillcolor='rgba(231, 76, 60, 0.6)',
-        hovertemplate='Month %{x}<br>Interest: ₹%{customdata:,.2f}<extra></extra>',
-        customdata=schedule_df['Interest_Payment']
-    ))
+    fig.add_traces([
+        # Principal payment area (bottom)
+        go.Scatter(
+            x=months,
+            y=principal,
+            fill='tozeroy',
+            name='Principal',
+            mode='lines',
+            line=dict(width=0.5, color='#27ae60'),
+            fillcolor='rgba(39, 174, 96, 0.6)',
+            hovertemplate='Month %{x}<br>Principal: ₹%{y:,.2f}<extra></extra>'
+        ),
+        # Interest payment area (stacked on top)
+        go.Scatter(
+            x=months,
+            y=principal + interest,
+            fill='tonexty',
+            name='Interest',
+            mode='lines',
+            line=dict(width=0.5, color='#e74c3c'),
+            fillcolor='rgba(231, 76, 60, 0.6)',
+            hovertemplate='Month %{x}<br>Interest: ₹%{customdata:,.2f}<extra></extra>',
+            customdata=interest
+        )
+    ])
     
     fig.update_layout(
         title='Payment Breakdown Over Time',
@@ -159,6 +174,7 @@ def plot_payment_breakdown(schedule_df: pd.DataFrame) -> go.Figure:
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=16, hash_funcs=_FRAME_HASH_FUNCS)
 def plot_cumulative_savings(base_df: pd.DataFrame, prepay_df: pd.DataFrame) -> go.Figure:
     """
     Create line chart showing cumulative interest savings over time.
@@ -170,34 +186,23 @@ def plot_cumulative_savings(base_df: pd.DataFrame, prepay_df: pd.DataFrame) -> g
     Returns:
         Plotly figure object
     """
-    # Calculate cumulative interest for both scenarios at each month
+    # Calculate cumulative interest for both scenarios at each month,
+    # padding the shorter schedule with its final value once it has ended
     max_months = max(len(base_df), len(prepay_df))
+    months = np.arange(1, max_months + 1)
+    base_cumulative = base_df['Cumulative_Interest'].to_numpy()
+    prepay_cumulative = prepay_df['Cumulative_Interest'].to_numpy()
     
-    savings_data = []
-    
-    for month in range(1, max_months + 1):
-        # Get cumulative interest from base (or last value if past end)
-        if month <= len(base_df):
-            base_cumulative = base_df[base_df['Month'] == month]['Cumulative_Interest'].values[0]
-        else:
-            base_cumulative = base_df['Cumulative_Interest'].iloc[-1]
-        
-        # Get cumulative interest from prepay (or last value if past end)
-        if month <= len(prepay_df):
-            prepay_cumulative = prepay_df[prepay_df['Month'] == month]['Cumulative_Interest'].values[0]
-        else:
-            prepay_cumulative = prepay_df['Cumulative_Interest'].iloc[-1]
-        
-        savings = base_cumulative - prepay_cumulative
-        savings_data.append({'Month': month, 'Cumulative_Savings': savings})
-    
-    savings_df = pd.DataFrame(savings_data)
+    savings = (
+        np.pad(base_cumulative, (0, max_months - len(base_cumulative)), mode='edge')
+        - np.pad(prepay_cumulative, (0, max_months - len(prepay_cumulative)), mode='edge')
+    )
     
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
-        x=savings_df['Month'],
-        y=savings_df['Cumulative_Savings'],
+        x=months,
+        y=savings,
         mode='lines',
         fill='tozeroy',
         name='Interest Savings',
@@ -219,6 +224,7 @@ def plot_cumulative_savings(base_df: pd.DataFrame, prepay_df: pd.DataFrame) -> g
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=16)
 def plot_payoff_timeline(base_months: int, prepay_months: int) -> go.Figure:
     """
     Simple visual showing timeline comparison.
@@ -232,27 +238,28 @@ def plot_payoff_timeline(base_months: int, prepay_months: int) -> go.Figure:
     """
     fig = go.Figure()
     
-    # Base scenario bar
-    fig.add_trace(go.Bar(
-        y=['Base Scenario'],
-        x=[base_months],
-        orientation='h',
-        name='Base',
-        marker_color='#3498db',
-        text=f'{base_months} months',
-        textposition='inside'
-    ))
-    
-    # Prepayment scenario bar
-    fig.add_trace(go.Bar(
-        y=['With Extra Payments'],
-        x=[prepay_months],
-        orientation='h',
-        name='Prepayment',
-        marker_color='#27ae60',
-        text=f'{prepay_months} months',
-        textposition='inside'
-    ))
+    fig.add_traces([
+        # Base scenario bar
+        go.Bar(
+            y=['Base Scenario'],
+            x=[base_months],
+            orientation='h',
+            name='Base',
+            marker_color='#3498db',
+            texttemplate='%{x} months',
+            textposition='inside'
+        ),
+        # Prepayment scenario bar
+        go.Bar(
+            y=['With Extra Payments'],
+            x=[prepay_months],
+            orientation='h',
+            name='Prepayment',
+            marker_color='#27ae60',
+            texttemplate='%{x} months',
+            textposition='inside'
+        )
+    ])
     
     fig.update_layout(
         title='Payoff Timeline Comparison',
@@ -289,47 +296,46 @@ def plot_loan_progress(
     
     fig = go.Figure()
     
-    # Principal progress
-    fig.add_trace(go.Bar(
-        name='Principal Paid',
-        x=['Principal'],
-        y=[principal_paid_pct],
-        marker_color='#2ecc71',
-        text=[f'{principal_paid_pct:.1f}%'],
-        textposition='inside',
-        textfont=dict(color='white', size=14)
-    ))
-    
-    fig.add_trace(go.Bar(
-        name='Principal Remaining',
-        x=['Principal'],
-        y=[100 - principal_paid_pct],
-        marker_color='#e74c3c',
-        text=[f'{100-principal_paid_pct:.1f}%'],
-        textposition='inside',
-        textfont=dict(color='white', size=14)
-    ))
-    
-    # Time progress
-    fig.add_trace(go.Bar(
-        name='Time Elapsed',
-        x=['Timeline'],
-        y=[time_elapsed_pct],
-        marker_color='#3498db',
-        text=[f'{time_elapsed_pct:.1f}%'],
-        textposition='inside',
-        textfont=dict(color='white', size=14)
-    ))
-    
-    fig.add_trace(go.Bar(
-        name='Time Remaining',
-        x=['Timeline'],
-        y=[100 - time_elapsed_pct],
-        marker_color='#95a5a6',
-        text=[f'{100-time_elapsed_pct:.1f}%'],
-        textposition='inside',
-        textfont=dict(color='white', size=14)
-    ))
+    fig.add_traces([
+        # Principal progress
+        go.Bar(
+            name='Principal Paid',
+            x=['Principal'],
+            y=[principal_paid_pct],
+            marker_color='#2ecc71',
+            text=[f'{principal_paid_pct:.1f}%'],
+            textposition='inside',
+            textfont=dict(color='white', size=14)
+        ),
+        go.Bar(
+            name='Principal Remaining',
+            x=['Principal'],
+            y=[100 - principal_paid_pct],
+            marker_color='#e74c3c',
+            text=[f'{100-principal_paid_pct:.1f}%'],
+            textposition='inside',
+            textfont=dict(color='white', size=14)
+        ),
+        # Time progress
+        go.Bar(
+            name='Time Elapsed',
+            x=['Timeline'],
+            y=[time_elapsed_pct],
+            marker_color='#3498db',
+            text=[f'{time_elapsed_pct:.1f}%'],
+            textposition='inside',
+            textfont=dict(color='white', size=14)
+        ),
+        go.Bar(
+            name='Time Remaining',
+            x=['Timeline'],
+            y=[100 - time_elapsed_pct],
+            marker_color='#95a5a6',
+            text=[f'{100-time_elapsed_pct:.1f}%'],
+            textposition='inside',
+            textfont=dict(color='white', size=14)
+        )
+    ])
     
     fig.update_layout(
         barmode='stack',